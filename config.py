@@ -0,0 +1,23 @@
+# Content: Shared configuration constants for the language learning app
+# Author: Shuai Guo
+# Email: shuaiguo0916@hotmail.com
+# Date: June, 2023
+
+# Define the language learning settings
+LANGUAGES = ['English', 'German', 'Spanish', 'French']
+SESSION_LENGTHS = ['Short', 'Long']
+PROFICIENCY_LEVELS = ['Beginner', 'Intermediate', 'Advanced']
+MAX_EXCHANGE_COUNTS = {
+    'Short': {'Conversation': 8, 'Debate': 4},
+    'Long': {'Conversation': 16, 'Debate': 8}
+}
+AUDIO_SPEECH = {
+    'English': 'en',
+    'German': 'de',
+    'Spanish': 'es',
+    'French': 'fr'
+}
+AVATAR_SEED = [123, 42]
+
+# Define backbone llm
+ENGINE = 'OpenAI'